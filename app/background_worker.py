@@ -3,21 +3,43 @@
 import asyncio
 import logging
 from datetime import datetime
+from typing import Optional
 
-from sqlmodel import Session, select
+from sqlalchemy import lambda_stmt
+from sqlmodel import Session, func, select
 
 from app.db import engine
-from app.models import Alarm, Recommendation, RecommendationAction
+from app.models import (
+    Alarm,
+    AlarmStatus,
+    Recommendation,
+    RecommendationAction,
+    utcnow,
+)
 from app.rules_engine import RulesEngine
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Alarm statuses that no longer need re-evaluation
+_TERMINAL_STATUSES = frozenset({AlarmStatus.RESOLVED, AlarmStatus.ACKNOWLEDGED})
+
+# Expired-snooze scan, compiled once and reused on every sweep
+_SNOOZE_SCAN = lambda_stmt(
+    lambda: select(Recommendation).where(
+        Recommendation.action == RecommendationAction.SNOOZE,
+        Recommendation.snooze_until.is_not(None),
+    )
+)
+
 
 class BackgroundWorker:
     """Background worker for periodic maintenance tasks."""
 
+    # Number of expired recommendations loaded and committed per chunk
+    BATCH_SIZE = 200
+
     def __init__(self, check_interval: int = 60):
         """
         Initialize the background worker.
@@ -27,53 +49,154 @@ class BackgroundWorker:
         """
         self.check_interval = check_interval
         self.running = False
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
 
     async def start(self):
         """Start the background worker."""
         self.running = True
+        # The event is bound to the running loop, so create it per start
+        self._wakeup = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
         logger.info("Background worker started")
 
         while self.running:
+            next_expiry = None
             try:
-                await self.check_snoozed_alarms()
+                next_expiry = await self.check_snoozed_alarms()
             except Exception as e:
                 logger.error(f"Error in background worker: {e}")
 
-            # Wait before next check
-            await asyncio.sleep(self.check_interval)
+            # Sleep until the next snooze expires, capped at check_interval
+            timeout = self.check_interval
+            if next_expiry is not None:
+                seconds_left = (next_expiry - utcnow()).total_seconds()
+                timeout = max(1.0, min(timeout, seconds_left))
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            except Exception as e:
+                logger.error(f"Error waiting in background worker: {e}")
+                await asyncio.sleep(timeout)
+            self._wakeup.clear()
 
     def stop(self):
         """Stop the background worker."""
         self.running = False
+        self.wake()
         logger.info("Background worker stopped")
 
-    async def check_snoozed_alarms(self):
+    def wake(self):
+        """
+        Wake the worker before its next scheduled check.
+
+        Safe to call from request handlers running in the threadpool. Does
+        nothing until the worker has started.
+        """
+        loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wakeup.set)
+
+    async def check_snoozed_alarms(self) -> Optional[datetime]:
         """
         Check for snoozed recommendations that have expired.
 
-        Re-evaluates alarms whose snooze period has ended.
+        The sweep uses a synchronous session, so it runs in a worker thread
+        to keep the event loop free for request handlers.
+
+        Returns:
+            When the next pending snooze expires, or None if none are pending
+        """
+        return await asyncio.to_thread(self._check_snoozed_alarms_sync)
+
+    def _check_snoozed_alarms_sync(self) -> Optional[datetime]:
+        """
+        Check for snoozed recommendations that have expired.
+
+        Re-evaluates alarms whose snooze period has ended. Expired
+        recommendations are fetched in id-ordered chunks of BATCH_SIZE and
+        each chunk is committed before the next is read, so memory stays
+        bounded during an expiry storm.
+
+        Returns:
+            When the next pending snooze expires, or None if none are pending
         """
         with Session(engine) as session:
             # Find snoozed recommendations that have expired
-            now = datetime.utcnow()
-            query = select(Recommendation).where(
-                Recommendation.action == RecommendationAction.SNOOZE,
-                Recommendation.snooze_until.is_not(None),
-                Recommendation.snooze_until <= now,
-            )
+            now = utcnow()
+            last_id = 0
 
-            expired_recommendations = session.exec(query).all()
+            batch_size = self.BATCH_SIZE
 
-            if not expired_recommendations:
-                logger.debug("No expired snoozed alarms found")
-                return
+            while True:
+                # now, last_id and batch_size are bound per call; the SQL is cached
+                query = _SNOOZE_SCAN + (
+                    lambda s: s.where(
+                        Recommendation.snooze_until <= now,
+                        Recommendation.id > last_id,
+                    )
+                    .order_by(Recommendation.id)
+                    .limit(batch_size)
+                )
+
+                expired_recommendations = session.scalars(query).all()
+
+                if not expired_recommendations:
+                    if not last_id:
+                        logger.debug("No expired snoozed alarms found")
+                    break
+
+                logger.info(
+                    f"Found {len(expired_recommendations)} expired snoozed alarms"
+                )
+
+                last_id = expired_recommendations[-1].id
+                self._reevaluate(session, expired_recommendations)
+                session.commit()
+
+            return session.exec(
+                select(func.min(Recommendation.snooze_until)).where(
+                    Recommendation.action == RecommendationAction.SNOOZE,
+                    Recommendation.snooze_until > now,
+                )
+            ).one()
+
+    @staticmethod
+    def _reevaluate(
+        session: Session, expired_recommendations: list[Recommendation]
+    ) -> None:
+        """
+        Re-evaluate the alarms behind a chunk of expired recommendations.
 
-            logger.info(f"Found {len(expired_recommendations)} expired snoozed alarms")
+        Each successful item clears its snooze in the same savepoint that
+        adds its replacement recommendation, so the two are never persisted
+        apart.
 
-            for recommendation in expired_recommendations:
-                try:
+        Args:
+            session: Database session
+            expired_recommendations: Expired snoozed recommendations
+        """
+        # Load every alarm for the chunk in one query
+        alarm_ids = {r.alarm_db_id for r in expired_recommendations}
+        alarms_by_id = {
+            a.id: a
+            for a in session.exec(select(Alarm).where(Alarm.id.in_(alarm_ids))).all()
+        }
+
+        # Load history for every live alarm in one query
+        RulesEngine.preload_history(
+            [a for a in alarms_by_id.values() if a.status not in _TERMINAL_STATUSES],
+            session,
+        )
+
+        for recommendation in expired_recommendations:
+            try:
+                # Savepoint per item so one failure doesn't discard the chunk
+                with session.begin_nested():
                     # Get the associated alarm
-                    alarm = session.get(Alarm, recommendation.alarm_db_id)
+                    alarm = alarms_by_id.get(recommendation.alarm_db_id)
                     if not alarm:
                         logger.warning(
                             f"Alarm {recommendation.alarm_db_id} not found for recommendation {recommendation.id}"
@@ -81,7 +204,7 @@ class BackgroundWorker:
                         continue
 
                     # Skip if alarm is already resolved
-                    if alarm.status in ["resolved", "acknowledged"]:
+                    if alarm.status in _TERMINAL_STATUSES:
                         logger.info(
                             f"Alarm {alarm.id} already {alarm.status}, skipping re-evaluation"
                         )
@@ -97,33 +220,36 @@ class BackgroundWorker:
                         alarm, session
                     )
 
-                    if new_recommendation_data:
-                        # Create new recommendation
-                        new_recommendation = Recommendation(**new_recommendation_data)
-                        session.add(new_recommendation)
-
-                        # Update turbine state if action changed
-                        if new_recommendation.action:
-                            RulesEngine.update_turbine_state(
-                                alarm.turbine_db_id, new_recommendation.action, alarm, session
-                            )
+                    if not new_recommendation_data:
+                        continue
 
-                        # Mark old recommendation as superseded (by setting snooze_until to None)
-                        recommendation.snooze_until = None
-                        session.add(recommendation)
+                    # Create new recommendation
+                    new_recommendation = Recommendation(**new_recommendation_data)
+                    session.add(new_recommendation)
+
+                    # Update turbine state if action changed
+                    if new_recommendation.action:
+                        RulesEngine.update_turbine_state(
+                            alarm.turbine_db_id,
+                            new_recommendation.action,
+                            alarm,
+                            session,
+                            commit=False,
+                        )
 
-                        session.commit()
+                    # Supersede the snooze in the same savepoint as its
+                    # replacement; on SQLite releasing the savepoint commits
+                    recommendation.snooze_until = None
 
-                        logger.info(
-                            f"Created new recommendation {new_recommendation.id} with action: {new_recommendation.action}"
-                        )
+                logger.info(
+                    f"Created new recommendation {new_recommendation.id} with action: {new_recommendation.action}"
+                )
 
-                except Exception as e:
-                    logger.error(
-                        f"Error processing recommendation {recommendation.id}: {e}"
-                    )
-                    session.rollback()
-                    continue
+            except Exception as e:
+                logger.error(
+                    f"Error processing recommendation {recommendation.id}: {e}"
+                )
+                continue
 
 
 # Global worker instance
@@ -136,6 +262,11 @@ async def start_background_worker():
     logger.info("Background worker task created")
 
 
+def notify_snooze_scheduled():
+    """Wake the background worker so it picks up a newly scheduled snooze."""
+    worker.wake()
+
+
 def stop_background_worker():
     """Stop the background worker."""
     worker.stop()
@@ -0,0 +1,125 @@
+"""In-process response cache for slow-changing, expensive endpoints."""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a per-entry TTL."""
+
+    def __init__(self, max_entries: int = 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries kept (least recently used evicted)
+        """
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, tuple[float, float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, allow_stale: bool = False) -> tuple[bool, Any]:
+        """
+        Look up a cached value.
+
+        Args:
+            key: Cache key
+            allow_stale: Return the value even if it is past its TTL but
+                still within its stale window
+
+        Returns:
+            Tuple of (hit, value)
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+
+            expires_at, stale_until, value = entry
+            if now < expires_at or (allow_stale and now < stale_until):
+                self._entries.move_to_end(key)
+                return True, value
+
+            if now >= stale_until:
+                del self._entries[key]
+            return False, None
+
+    def set(self, key: Hashable, value: Any, ttl: float, stale_ttl: float) -> None:
+        """
+        Store a value.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            ttl: Seconds the value is fresh
+            stale_ttl: Seconds the value may still be served after an error
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = (now + ttl, now + max(ttl, stale_ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached entry."""
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared cache for endpoint responses
+response_cache = TTLCache()
+
+
+def cached_response(ttl: float, stale_ttl: float = 300.0) -> Callable:
+    """
+    Cache a sync endpoint's return value keyed on its query parameters.
+
+    The database session argument is excluded from the key. If the endpoint
+    raises and a stale copy is still within stale_ttl, the stale copy is
+    served instead of the error. Cached values are shared between requests
+    and must not be mutated.
+
+    Args:
+        ttl: Seconds a response stays fresh
+        stale_ttl: Seconds a response may be served after the endpoint fails
+
+    Returns:
+        Decorator for the endpoint function
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (
+                func.__module__,
+                func.__qualname__,
+                tuple(sorted((k, v) for k, v in kwargs.items() if k != "session")),
+            )
+
+            hit, value = response_cache.get(key)
+            if hit:
+                return value
+
+            try:
+                value = func(*args, **kwargs)
+            except Exception:
+                hit, value = response_cache.get(key, allow_stale=True)
+                if hit:
+                    logger.warning(f"Serving stale {func.__name__} response")
+                    return value
+                raise
+
+            response_cache.set(key, value, ttl, stale_ttl)
+            return value
+
+        return wrapper
+
+    return decorator
@@ -8,16 +8,24 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str = "sqlite:///./wind_turbines.db"
+    SQL_ECHO: bool = False
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 40
 
     # API
     API_V1_PREFIX: str = "/api/v1"
     PROJECT_NAME: str = "Wind Fault Orchestrator"
     VERSION: str = "0.1.0"
 
+    # CORS (JSON lists when set from the environment)
+    CORS_ORIGINS: list[str] = ["*"]
+    CORS_METHODS: list[str] = ["GET", "POST", "PATCH", "DELETE"]
+
     # Server
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     DEBUG: bool = True
+    THREADPOOL_SIZE: int = 60  # Concurrent sync request handlers
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -3,30 +3,102 @@
 from typing import Annotated, Generator
 
 from fastapi import Depends
-from sqlmodel import Session, SQLModel, create_engine
+from sqlalchemy import event, text
+from sqlmodel import Session, SQLModel, create_engine, func, select
 
 from app.config import settings
 
 
+# Compiled statements kept per engine; the analytics and list endpoints
+# build many filter combinations, so the default of 500 is too small
+QUERY_CACHE_SIZE = 1200
+
 # Create engine based on database URL
-engine = create_engine(
-    settings.DATABASE_URL,
-    echo=settings.DEBUG,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {},
+if "sqlite" in settings.DATABASE_URL:
+    engine = create_engine(
+        settings.DATABASE_URL,
+        echo=settings.SQL_ECHO,
+        query_cache_size=QUERY_CACHE_SIZE,
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
+else:
+    # Size the pool so every request thread can hold a connection
+    engine = create_engine(
+        settings.DATABASE_URL,
+        echo=settings.SQL_ECHO,
+        query_cache_size=QUERY_CACHE_SIZE,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+    )
+
+
+if "sqlite" in settings.DATABASE_URL:
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Enable WAL so ingest and the background worker can write concurrently."""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=134217728")
+        cursor.close()
+
+
+# Planner row estimate for a table, maintained by ANALYZE/autovacuum
+_RELTUPLES_STMT = text(
+    "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"
 )
 
+# Tables estimated below this size are always counted exactly
+APPROX_COUNT_THRESHOLD = 100_000
+
 
 def create_db_and_tables():
     """Create database tables."""
+    if engine.dialect.name == "postgresql":
+        # The turbine location trigram index needs pg_trgm
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
     SQLModel.metadata.create_all(engine)
 
 
 def get_session() -> Generator[Session, None, None]:
-    """Dependency for getting database session."""
-    with Session(engine) as session:
+    """
+    Dependency for getting database session.
+
+    Objects are not expired on commit, so handlers can return what they just
+    wrote without reloading it.
+    """
+    with Session(engine, expire_on_commit=False) as session:
         yield session
 
 
+def count_rows(session: Session, model: type[SQLModel], filters: list) -> int:
+    """
+    Count rows for a paginated list endpoint.
+
+    Unfiltered counts of large PostgreSQL tables use the planner's estimate
+    from pg_class.reltuples, which is constant-time but approximate. Filtered
+    queries, small tables and other databases get an exact COUNT(*).
+
+    Args:
+        session: Database session
+        model: Table model to count
+        filters: WHERE clauses applied to the list query
+
+    Returns:
+        Exact or estimated row count
+    """
+    if not filters and session.get_bind().dialect.name == "postgresql":
+        estimate = session.scalar(_RELTUPLES_STMT, {"name": model.__tablename__})
+        if estimate is not None and estimate >= APPROX_COUNT_THRESHOLD:
+            return estimate
+
+    return session.exec(select(func.count()).select_from(model).where(*filters)).one()
+
+
 # Type alias for dependency injection
 SessionDep = Annotated[Session, Depends(get_session)]
 
@@ -2,15 +2,20 @@
 
 from contextlib import asynccontextmanager
 
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import text
 
 from app.background_worker import start_background_worker, stop_background_worker
 from app.config import settings
-from app.db import create_db_and_tables
+from app.db import create_db_and_tables, engine
 from app.routers import alarms, analytics, recommendations, turbines
 from app.schemas import HealthCheck
 
+# Connectivity probe, built once and reused by every health check
+_HEALTHCHECK_STMT = text("SELECT 1")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -19,6 +24,10 @@ async def lifespan(app: FastAPI):
 
     Creates database tables on startup and starts background worker.
     """
+    # Sync handlers run in AnyIO's threadpool; raise its default cap of 40
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = settings.THREADPOOL_SIZE
+
     # Startup: Create database tables
     create_db_and_tables()
     
@@ -42,9 +51,9 @@ app = FastAPI(
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Configure appropriately for production
+    allow_origins=settings.CORS_ORIGINS,  # Set explicit origins for production
     allow_credentials=True,
-    allow_methods=["*"],
+    allow_methods=settings.CORS_METHODS,
     allow_headers=["*"],
 )
 
@@ -77,11 +86,8 @@ def health_check():
 
     # Test database connection
     try:
-        from app.db import engine
-        from sqlalchemy import text
-
         with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
+            conn.execute(_HEALTHCHECK_STMT)
     except Exception as e:
         database_status = f"error: {str(e)}"
 
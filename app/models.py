@@ -1,12 +1,26 @@
 """SQLModel database models."""
 
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
 from typing import Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 
+def utcnow() -> datetime:
+    """
+    Current UTC time as a naive datetime.
+
+    Timestamp columns are stored without a timezone, so this is the
+    non-deprecated equivalent of datetime.utcnow().
+
+    Returns:
+        Naive datetime in UTC
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class AlarmSeverity(str, Enum):
     """Alarm severity levels."""
 
@@ -58,6 +72,15 @@ class Turbine(SQLModel, table=True):
     """Wind turbine model."""
 
     __tablename__ = "turbines"
+    __table_args__ = (
+        # Trigram index for the substring location filter (PostgreSQL only)
+        Index(
+            "ix_turbine_location_trgm",
+            "location",
+            postgresql_using="gin",
+            postgresql_ops={"location": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     turbine_id: str = Field(unique=True, index=True, max_length=100)
@@ -68,9 +91,9 @@ class Turbine(SQLModel, table=True):
     installation_date: Optional[datetime] = None
     is_active: bool = Field(default=True)
     state: TurbineState = Field(default=TurbineState.ONLINE)
-    last_state_change: Optional[datetime] = Field(default_factory=datetime.utcnow)
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    last_state_change: Optional[datetime] = Field(default_factory=utcnow)
+    created_at: datetime = Field(default_factory=utcnow)
+    updated_at: datetime = Field(default_factory=utcnow)
 
     # Relationships
     alarms: list["Alarm"] = Relationship(back_populates="turbine")
@@ -80,14 +103,23 @@ class Alarm(SQLModel, table=True):
     """Turbine alarm model (also known as FaultEvent)."""
 
     __tablename__ = "alarms"
+    __table_args__ = (
+        # Back the analytics filters; also serve alarm_code / turbine_db_id alone
+        Index("ix_alarm_code_time", "alarm_code", "occurred_at"),
+        Index("ix_alarm_turbine_time", "turbine_db_id", "occurred_at"),
+        # Backs the rules engine's per-turbine, per-code history counts
+        Index(
+            "ix_alarm_turbine_code_time", "turbine_db_id", "alarm_code", "occurred_at"
+        ),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     turbine_db_id: int = Field(foreign_key="turbines.id")
-    alarm_code: str = Field(index=True, max_length=50)
+    alarm_code: str = Field(max_length=50)
     alarm_description: str = Field(max_length=500)
-    severity: AlarmSeverity = Field(default=AlarmSeverity.MEDIUM)
+    severity: AlarmSeverity = Field(default=AlarmSeverity.MEDIUM, index=True)
     status: AlarmStatus = Field(default=AlarmStatus.ACTIVE, index=True)
-    occurred_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    occurred_at: datetime = Field(default_factory=utcnow, index=True)
     acknowledged_at: Optional[datetime] = None
     resolved_at: Optional[datetime] = None
     
@@ -97,8 +129,8 @@ class Alarm(SQLModel, table=True):
     note: Optional[str] = Field(default=None, max_length=1000)
     
     extra_metadata: Optional[str] = None  # JSON string for additional data (renamed from metadata)
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=utcnow)
+    updated_at: datetime = Field(default_factory=utcnow)
 
     # Relationships
     turbine: Turbine = Relationship(back_populates="alarms")
@@ -109,9 +141,15 @@ class Recommendation(SQLModel, table=True):
     """Alarm recommendation model."""
 
     __tablename__ = "recommendations"
+    __table_args__ = (
+        # Backs the background worker's expired-snooze scan
+        Index("ix_recommendation_snooze_scan", "action", "snooze_until"),
+        # Backs the time-windowed action analytics
+        Index("ix_recommendation_created_action", "created_at", "action"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
-    alarm_db_id: int = Field(foreign_key="alarms.id")
+    alarm_db_id: int = Field(foreign_key="alarms.id", index=True)
     title: str = Field(max_length=200)
     description: str = Field(max_length=1000)
     priority: RecommendationPriority = Field(default=RecommendationPriority.MEDIUM)
@@ -124,7 +162,7 @@ class Recommendation(SQLModel, table=True):
     action_items: Optional[str] = None  # JSON string for action items list
     estimated_downtime_hours: Optional[float] = None
     is_automated: bool = Field(default=False)
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=utcnow)
 
     # Relationships
     alarm: Alarm = Relationship(back_populates="recommendations")
@@ -1,13 +1,13 @@
 """Alarm ingestion endpoints."""
 
-from datetime import datetime
 from typing import Optional
 
 from fastapi import APIRouter, HTTPException, Query
-from sqlmodel import select
+from sqlmodel import Session, func, select, update
 
+from app.background_worker import notify_snooze_scheduled
 from app.db import SessionDep
-from app.models import Alarm, AlarmStatus, Turbine
+from app.models import Alarm, AlarmStatus, RecommendationAction, Turbine, utcnow
 from app.rules_engine import RulesEngine
 from app.schemas import AlarmCreate, AlarmListResponse, AlarmResponse, AlarmUpdate
 
@@ -49,11 +49,10 @@ def ingest_alarm(alarm: AlarmCreate, session: SessionDep):
 
     # Set occurred_at if not provided
     if not db_alarm.occurred_at:
-        db_alarm.occurred_at = datetime.utcnow()
+        db_alarm.occurred_at = utcnow()
 
     session.add(db_alarm)
     session.commit()
-    session.refresh(db_alarm)
 
     # Generate recommendation automatically using advanced rules engine
     from app.models import Recommendation
@@ -70,6 +69,10 @@ def ingest_alarm(alarm: AlarmCreate, session: SessionDep):
                 turbine.id, db_recommendation.action, db_alarm, session
             )
 
+        # Wake the worker so the snooze expiry is scheduled promptly
+        if db_recommendation.action == RecommendationAction.SNOOZE:
+            notify_snooze_scheduled()
+
     return db_alarm
 
 
@@ -97,32 +100,38 @@ def list_alarms(
         List of alarms and total count
     """
     query = select(Alarm)
+    count_query = select(func.count()).select_from(Alarm)
 
-    # Apply filters
+    # Collect filters so the count and page queries share them
+    filters = []
     if turbine_id:
-        turbine = session.exec(
-            select(Turbine).where(Turbine.turbine_id == turbine_id)
-        ).first()
-        if turbine:
-            query = query.where(Alarm.turbine_db_id == turbine.id)
+        # Resolve the external turbine_id in the same statement
+        query = query.join(Turbine, Turbine.id == Alarm.turbine_db_id)
+        count_query = count_query.join(Turbine, Turbine.id == Alarm.turbine_db_id)
+        filters.append(Turbine.turbine_id == turbine_id)
 
     if status:
-        query = query.where(Alarm.status == status)
+        filters.append(Alarm.status == status)
 
     if alarm_code:
-        query = query.where(Alarm.alarm_code == alarm_code)
-
-    # Order by most recent first
-    query = query.order_by(Alarm.occurred_at.desc())
-
-    # Get total count
-    total = len(session.exec(query).all())
-
-    # Apply pagination
-    query = query.offset(skip).limit(limit)
+        filters.append(Alarm.alarm_code == alarm_code)
+
+    # Get total count without loading rows
+    total = session.exec(count_query.where(*filters)).one()
+
+    # Order by most recent first and apply pagination
+    query = (
+        query.where(*filters)
+        .order_by(Alarm.occurred_at.desc())
+        .offset(skip)
+        .limit(limit)
+    )
     alarms = session.exec(query).all()
 
-    return AlarmListResponse(alarms=alarms, total=total)
+    # Rows come straight from the database, so skip per-row validation
+    return AlarmListResponse.model_construct(
+        alarms=[AlarmResponse.from_orm_fast(alarm) for alarm in alarms], total=total
+    )
 
 
 @router.get("/{alarm_id}", response_model=AlarmResponse)
@@ -174,10 +183,9 @@ def update_alarm(alarm_id: int, alarm_update: AlarmUpdate, session: SessionDep):
     for field, value in update_data.items():
         setattr(alarm, field, value)
 
-    alarm.updated_at = datetime.utcnow()
+    alarm.updated_at = utcnow()
     session.add(alarm)
     session.commit()
-    session.refresh(alarm)
 
     return alarm
 
@@ -197,20 +205,9 @@ def acknowledge_alarm(alarm_id: int, session: SessionDep):
     Raises:
         HTTPException: If alarm not found
     """
-    alarm = session.get(Alarm, alarm_id)
-
-    if not alarm:
-        raise HTTPException(status_code=404, detail="Alarm not found")
-
-    alarm.status = AlarmStatus.ACKNOWLEDGED
-    alarm.acknowledged_at = datetime.utcnow()
-    alarm.updated_at = datetime.utcnow()
-
-    session.add(alarm)
-    session.commit()
-    session.refresh(alarm)
-
-    return alarm
+    return _transition_alarm(
+        session, alarm_id, AlarmStatus.ACKNOWLEDGED, "acknowledged_at"
+    )
 
 
 @router.post("/{alarm_id}/resolve", response_model=AlarmResponse)
@@ -228,18 +225,46 @@ def resolve_alarm(alarm_id: int, session: SessionDep):
     Raises:
         HTTPException: If alarm not found
     """
-    alarm = session.get(Alarm, alarm_id)
+    return _transition_alarm(session, alarm_id, AlarmStatus.RESOLVED, "resolved_at")
+
+
+def _transition_alarm(
+    session: Session, alarm_id: int, status: AlarmStatus, timestamp_field: str
+) -> Alarm:
+    """
+    Move an alarm to a new status in a single UPDATE round-trip.
+
+    Uses UPDATE ... RETURNING where the database supports it, otherwise
+    falls back to an UPDATE followed by a primary-key lookup.
+
+    Args:
+        session: Database session
+        alarm_id: Alarm ID
+        status: New alarm status
+        timestamp_field: Field stamped with the transition time
+
+    Returns:
+        Updated alarm
+
+    Raises:
+        HTTPException: If alarm not found
+    """
+    now = utcnow()
+    stmt = (
+        update(Alarm)
+        .where(Alarm.id == alarm_id)
+        .values({"status": status, timestamp_field: now, "updated_at": now})
+    )
+
+    if session.get_bind().dialect.update_returning:
+        alarm = session.scalars(stmt.returning(Alarm)).first()
+    else:
+        result = session.exec(stmt)
+        alarm = session.get(Alarm, alarm_id) if result.rowcount else None
 
     if not alarm:
         raise HTTPException(status_code=404, detail="Alarm not found")
 
-    alarm.status = AlarmStatus.RESOLVED
-    alarm.resolved_at = datetime.utcnow()
-    alarm.updated_at = datetime.utcnow()
-
-    session.add(alarm)
     session.commit()
-    session.refresh(alarm)
 
     return alarm
-
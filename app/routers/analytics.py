@@ -1,17 +1,22 @@
 """Analytics endpoints for fault analysis and trending."""
 
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Iterator, Optional
 
 from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlmodel import func, select
+from sqlmodel import Session, func, select
 
-from app.db import SessionDep
-from app.models import Alarm, Recommendation, Turbine
+from app.cache import cached_response
+from app.db import SessionDep, engine
+from app.models import Alarm, Recommendation, Turbine, utcnow
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
+# Rows fetched per round-trip when streaming temperature trends
+TREND_STREAM_BATCH_SIZE = 1000
+
 
 # ============= Response Schemas =============
 
@@ -62,10 +67,28 @@ class AnalyticsSummary(BaseModel):
     avg_temperature: Optional[float] = None
 
 
+class ActionDistribution(BaseModel):
+    """Distribution of recommendation actions."""
+
+    distribution: dict[str, int]
+    total: int
+    days: Optional[int] = None
+
+
+class EscalationRate(BaseModel):
+    """Escalation rate statistics."""
+
+    total_recommendations: int
+    escalated: int
+    escalation_rate: float
+    days: int
+
+
 # ============= Analytics Endpoints =============
 
 
 @router.get("/summary", response_model=AnalyticsSummary)
+@cached_response(ttl=30)
 def get_analytics_summary(session: SessionDep):
     """
     Get overall analytics summary.
@@ -76,26 +99,26 @@ def get_analytics_summary(session: SessionDep):
     Returns:
         Analytics summary with key metrics
     """
-    # Count turbines
-    total_turbines = len(session.exec(select(Turbine)).all())
-    active_turbines = len(
-        session.exec(select(Turbine).where(Turbine.is_active == True)).all()
-    )
-
-    # Count alarms
-    total_alarms = len(session.exec(select(Alarm)).all())
-    active_alarms = len(
-        session.exec(select(Alarm).where(Alarm.status == "active")).all()
-    )
-    critical_alarms = len(
-        session.exec(select(Alarm).where(Alarm.severity == "critical")).all()
-    )
-
-    # Calculate average temperature
-    query = select(func.avg(Alarm.temperature_c)).where(
-        Alarm.temperature_c.is_not(None)
+    # Turbine counts ride along as scalar subqueries so the whole summary
+    # is a single round-trip over the alarms table
+    query = select(
+        select(func.count(Turbine.id)).scalar_subquery(),
+        select(func.count(Turbine.id))
+        .where(Turbine.is_active == True)
+        .scalar_subquery(),
+        func.count(Alarm.id),
+        func.count(Alarm.id).filter(Alarm.status == "active"),
+        func.count(Alarm.id).filter(Alarm.severity == "critical"),
+        func.avg(Alarm.temperature_c),
     )
-    avg_temp = session.exec(query).first()
+    (
+        total_turbines,
+        active_turbines,
+        total_alarms,
+        active_alarms,
+        critical_alarms,
+        avg_temp,
+    ) = session.exec(query).one()
 
     return AnalyticsSummary(
         total_turbines=total_turbines,
@@ -103,11 +126,12 @@ def get_analytics_summary(session: SessionDep):
         total_alarms=total_alarms,
         active_alarms=active_alarms,
         critical_alarms=critical_alarms,
-        avg_temperature=float(avg_temp) if avg_temp else None,
+        avg_temperature=float(avg_temp) if avg_temp is not None else None,
     )
 
 
 @router.get("/top-faults", response_model=list[FaultCodeStats])
+@cached_response(ttl=60)
 def get_top_faults(
     session: SessionDep,
     limit: int = Query(10, ge=1, le=100, description="Maximum number of results"),
@@ -126,11 +150,15 @@ def get_top_faults(
     Returns:
         List of fault codes with counts
     """
-    query = select(Alarm.alarm_code, func.count(Alarm.id).label("count"))
+    query = select(
+        Alarm.alarm_code,
+        func.count(Alarm.id).label("count"),
+        func.max(Alarm.alarm_description).label("description"),
+    )
 
     # Apply time filter if specified
     if days:
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
+        cutoff_date = utcnow() - timedelta(days=days)
         query = query.where(Alarm.occurred_at >= cutoff_date)
 
     query = query.group_by(Alarm.alarm_code).order_by(func.count(Alarm.id).desc())
@@ -139,20 +167,10 @@ def get_top_faults(
     results = session.exec(query.limit(limit)).all()
 
     # Format response
-    fault_stats = []
-    for alarm_code, count in results:
-        # Get a sample description
-        sample_alarm = session.exec(
-            select(Alarm).where(Alarm.alarm_code == alarm_code).limit(1)
-        ).first()
-
-        fault_stats.append(
-            FaultCodeStats(
-                alarm_code=alarm_code,
-                count=count,
-                description=sample_alarm.alarm_description if sample_alarm else None,
-            )
-        )
+    fault_stats = [
+        FaultCodeStats(alarm_code=alarm_code, count=count, description=description)
+        for alarm_code, count, description in results
+    ]
 
     return fault_stats
 
@@ -178,24 +196,23 @@ def get_fault_frequency(
     Returns:
         Fault frequency statistics
     """
-    cutoff_date = datetime.utcnow() - timedelta(days=days)
+    cutoff_date = utcnow() - timedelta(days=days)
 
-    # Build query
-    query = select(Alarm).where(
-        Alarm.alarm_code == alarm_code, Alarm.occurred_at >= cutoff_date
+    # Count in SQL instead of loading every matching alarm
+    query = (
+        select(func.count())
+        .select_from(Alarm)
+        .where(Alarm.alarm_code == alarm_code, Alarm.occurred_at >= cutoff_date)
     )
 
-    # Apply turbine filter if specified
+    # Apply turbine filter if specified, resolved in the same statement
     if turbine_id:
-        turbine = session.exec(
-            select(Turbine).where(Turbine.turbine_id == turbine_id)
-        ).first()
-        if turbine:
-            query = query.where(Alarm.turbine_db_id == turbine.id)
+        turbine_db_id = (
+            select(Turbine.id).where(Turbine.turbine_id == turbine_id).scalar_subquery()
+        )
+        query = query.where(Alarm.turbine_db_id == turbine_db_id)
 
-    # Count occurrences
-    alarms = session.exec(query).all()
-    count = len(alarms)
+    count = session.exec(query).one()
 
     return FaultFrequency(
         alarm_code=alarm_code,
@@ -224,55 +241,43 @@ def get_troubled_turbines(
     Returns:
         List of troubled turbines with alarm counts
     """
-    # Build base query
-    query = select(
-        Turbine.turbine_id,
-        Turbine.name,
-        Turbine.location,
-        func.count(Alarm.id).label("alarm_count"),
-    ).join(Alarm, Turbine.id == Alarm.turbine_db_id)
-
-    # Apply time filter if specified
+    # Window applies to the total only; active alarms are counted over all time
+    alarm_count = func.count(Alarm.id)
     if days:
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-        query = query.where(Alarm.occurred_at >= cutoff_date)
+        cutoff_date = utcnow() - timedelta(days=days)
+        alarm_count = alarm_count.filter(Alarm.occurred_at >= cutoff_date)
 
-    # Group and order
+    # Single grouped query with both counts
     query = (
-        query.group_by(Turbine.turbine_id, Turbine.name, Turbine.location)
-        .order_by(func.count(Alarm.id).desc())
+        select(
+            Turbine.turbine_id,
+            Turbine.name,
+            Turbine.location,
+            alarm_count.label("alarm_count"),
+            func.count(Alarm.id)
+            .filter(Alarm.status == "active")
+            .label("active_alarm_count"),
+        )
+        .join(Alarm, Turbine.id == Alarm.turbine_db_id)
+        .group_by(Turbine.id, Turbine.turbine_id, Turbine.name, Turbine.location)
+        .having(alarm_count > 0)
+        .order_by(alarm_count.desc())
         .limit(limit)
     )
 
     results = session.exec(query).all()
 
-    # Format response with active alarm counts
-    troubled = []
-    for turbine_id, name, location, alarm_count in results:
-        # Get turbine
-        turbine = session.exec(
-            select(Turbine).where(Turbine.turbine_id == turbine_id)
-        ).first()
-
-        if turbine:
-            # Count active alarms
-            active_count = len(
-                session.exec(
-                    select(Alarm).where(
-                        Alarm.turbine_db_id == turbine.id, Alarm.status == "active"
-                    )
-                ).all()
-            )
-
-            troubled.append(
-                TroubledTurbine(
-                    turbine_id=turbine_id,
-                    turbine_name=name,
-                    alarm_count=alarm_count,
-                    active_alarm_count=active_count,
-                    location=location,
-                )
-            )
+    # Format response
+    troubled = [
+        TroubledTurbine(
+            turbine_id=turbine_id,
+            turbine_name=name,
+            alarm_count=count,
+            active_alarm_count=active_count,
+            location=location,
+        )
+        for turbine_id, name, location, count, active_count in results
+    ]
 
     return troubled
 
@@ -280,7 +285,6 @@ def get_troubled_turbines(
 @router.get("/temp-trends/{turbine_id}", response_model=list[TemperatureTrend])
 def get_temperature_trends(
     turbine_id: int,
-    session: SessionDep,
     days: int = Query(7, ge=1, le=365, description="Time window in days"),
     alarm_code: Optional[str] = Query(
         None, description="Filter by specific alarm code"
@@ -289,48 +293,70 @@ def get_temperature_trends(
     """
     Get temperature trends for a specific turbine.
 
+    The response is streamed as a JSON array so long windows are never
+    held in memory all at once.
+
     Args:
         turbine_id: Turbine database ID
-        session: Database session
         days: Time window in days
         alarm_code: Optional alarm code filter
 
     Returns:
-        List of temperature trend data points
+        Streaming JSON list of temperature trend data points
     """
-    cutoff_date = datetime.utcnow() - timedelta(days=days)
+    cutoff_date = utcnow() - timedelta(days=days)
 
-    # Build query
+    # Build query over just the columns in the response
     query = (
-        select(Alarm)
+        select(Alarm.occurred_at, Alarm.temperature_c, Alarm.alarm_code)
         .where(
             Alarm.turbine_db_id == turbine_id,
             Alarm.temperature_c.is_not(None),
             Alarm.occurred_at >= cutoff_date,
         )
         .order_by(Alarm.occurred_at.asc())
+        .execution_options(yield_per=TREND_STREAM_BATCH_SIZE)
     )
 
     # Apply alarm code filter if specified
     if alarm_code:
         query = query.where(Alarm.alarm_code == alarm_code)
 
-    alarms = session.exec(query).all()
+    return StreamingResponse(_stream_trends(query), media_type="application/json")
 
-    # Format response
-    trends = [
-        TemperatureTrend(
-            occurred_at=alarm.occurred_at,
-            temperature_c=alarm.temperature_c,
-            alarm_code=alarm.alarm_code,
-        )
-        for alarm in alarms
-    ]
 
-    return trends
+def _stream_trends(query) -> Iterator[str]:
+    """
+    Serialize temperature trend rows as a JSON array, one batch at a time.
+
+    Uses its own session because the request session is closed before the
+    response body is streamed.
+
+    Args:
+        query: Trend query with yield_per set
+
+    Yields:
+        Chunks of the JSON array
+    """
+    with Session(engine) as session:
+        separator = "["
+        for rows in session.exec(query).partitions():
+            yield separator + ",".join(
+                TemperatureTrend(
+                    occurred_at=occurred_at,
+                    temperature_c=temperature_c,
+                    alarm_code=code,
+                ).model_dump_json()
+                for occurred_at, temperature_c, code in rows
+            )
+            separator = ","
+
+        # Close the array, or emit an empty one when nothing matched
+        yield "]" if separator == "," else "[]"
 
 
-@router.get("/action-distribution")
+@router.get("/action-distribution", response_model=ActionDistribution)
+@cached_response(ttl=60)
 def get_action_distribution(
     session: SessionDep,
     days: Optional[int] = Query(
@@ -347,13 +373,17 @@ def get_action_distribution(
     Returns:
         Distribution of actions with counts
     """
+    # The grand total rides along on every row as a window over the groups
+    # (ROLLUP is not available on SQLite)
     query = select(
-        Recommendation.action, func.count(Recommendation.id).label("count")
+        Recommendation.action,
+        func.count(Recommendation.id).label("count"),
+        func.sum(func.count(Recommendation.id)).over().label("total"),
     ).where(Recommendation.action.is_not(None))
 
     # Apply time filter if specified
     if days:
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
+        cutoff_date = utcnow() - timedelta(days=days)
         query = query.where(Recommendation.created_at >= cutoff_date)
 
     query = query.group_by(Recommendation.action)
@@ -361,16 +391,17 @@ def get_action_distribution(
     results = session.exec(query).all()
 
     # Format response
-    distribution = {str(action): count for action, count in results}
+    distribution = {str(action): count for action, count, _ in results}
 
     return {
         "distribution": distribution,
-        "total": sum(distribution.values()),
+        "total": int(results[0].total) if results else 0,
         "days": days,
     }
 
 
-@router.get("/escalation-rate")
+@router.get("/escalation-rate", response_model=EscalationRate)
+@cached_response(ttl=60)
 def get_escalation_rate(
     session: SessionDep,
     days: int = Query(30, ge=1, le=365, description="Time window in days"),
@@ -385,19 +416,14 @@ def get_escalation_rate(
     Returns:
         Escalation rate statistics
     """
-    cutoff_date = datetime.utcnow() - timedelta(days=days)
-
-    # Total recommendations
-    total_query = select(func.count(Recommendation.id)).where(
-        Recommendation.created_at >= cutoff_date
-    )
-    total = session.exec(total_query).first() or 0
+    cutoff_date = utcnow() - timedelta(days=days)
 
-    # Escalated recommendations
-    escalated_query = select(func.count(Recommendation.id)).where(
-        Recommendation.created_at >= cutoff_date, Recommendation.action == "escalate"
-    )
-    escalated = session.exec(escalated_query).first() or 0
+    # Total and escalated recommendations in one pass
+    query = select(
+        func.count(Recommendation.id),
+        func.count(Recommendation.id).filter(Recommendation.action == "escalate"),
+    ).where(Recommendation.created_at >= cutoff_date)
+    total, escalated = session.exec(query).one()
 
     # Calculate rate
     escalation_rate = (escalated / total * 100) if total > 0 else 0.0
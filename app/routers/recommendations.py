@@ -3,12 +3,19 @@
 from typing import Optional
 
 from fastapi import APIRouter, HTTPException, Query
-from sqlmodel import select
-
-from app.db import SessionDep
-from app.models import Alarm, Recommendation, RecommendationPriority
+from sqlmodel import case, select
+
+from app.background_worker import notify_snooze_scheduled
+from app.db import SessionDep, count_rows
+from app.models import (
+    Alarm,
+    Recommendation,
+    RecommendationAction,
+    RecommendationPriority,
+)
 from app.rules_engine import RulesEngine
 from app.schemas import (
+    RecommendationBulkGenerate,
     RecommendationCreate,
     RecommendationListResponse,
     RecommendationResponse,
@@ -40,35 +47,43 @@ def list_recommendations(
     Returns:
         List of recommendations and total count
     """
-    query = select(Recommendation)
-
     # Apply filters
+    filters = []
     if priority:
-        query = query.where(Recommendation.priority == priority)
+        filters.append(Recommendation.priority == priority)
 
     if is_automated is not None:
-        query = query.where(Recommendation.is_automated == is_automated)
+        filters.append(Recommendation.is_automated == is_automated)
 
-    # Order by priority (urgent first) and creation time
-    priority_order = {
-        RecommendationPriority.URGENT: 0,
-        RecommendationPriority.HIGH: 1,
-        RecommendationPriority.MEDIUM: 2,
-        RecommendationPriority.LOW: 3,
-    }
+    # Get total count without loading rows
+    total = count_rows(session, Recommendation, filters)
 
-    # Get all and sort in Python (SQLModel limitation for enum ordering)
-    all_recommendations = session.exec(query).all()
-    sorted_recommendations = sorted(
-        all_recommendations,
-        key=lambda r: (priority_order.get(r.priority, 99), -r.created_at.timestamp()),
+    # Order by priority (urgent first) and creation time
+    priority_rank = case(
+        (Recommendation.priority == RecommendationPriority.URGENT, 0),
+        (Recommendation.priority == RecommendationPriority.HIGH, 1),
+        (Recommendation.priority == RecommendationPriority.MEDIUM, 2),
+        (Recommendation.priority == RecommendationPriority.LOW, 3),
+        else_=99,
     )
 
     # Apply pagination
-    total = len(sorted_recommendations)
-    recommendations = sorted_recommendations[skip : skip + limit]
+    query = (
+        select(Recommendation)
+        .where(*filters)
+        .order_by(priority_rank, Recommendation.created_at.desc(), Recommendation.id)
+        .offset(skip)
+        .limit(limit)
+    )
+    recommendations = session.exec(query).all()
 
-    return RecommendationListResponse(recommendations=recommendations, total=total)
+    # Rows come straight from the database, so skip per-row validation
+    return RecommendationListResponse.model_construct(
+        recommendations=[
+            RecommendationResponse.from_orm_fast(r) for r in recommendations
+        ],
+        total=total,
+    )
 
 
 @router.get("/{alarm_id}", response_model=RecommendationListResponse)
@@ -95,8 +110,11 @@ def get_recommendations_for_alarm(alarm_id: int, session: SessionDep):
     query = select(Recommendation).where(Recommendation.alarm_db_id == alarm_id)
     recommendations = session.exec(query).all()
 
-    return RecommendationListResponse(
-        recommendations=recommendations, total=len(recommendations)
+    return RecommendationListResponse.model_construct(
+        recommendations=[
+            RecommendationResponse.from_orm_fast(r) for r in recommendations
+        ],
+        total=len(recommendations),
     )
 
 
@@ -139,9 +157,75 @@ def generate_recommendation_for_alarm(alarm_id: int, session: SessionDep):
             alarm.turbine_db_id, db_recommendation.action, alarm, session
         )
 
+    # Wake the worker so the snooze expiry is scheduled promptly
+    if db_recommendation.action == RecommendationAction.SNOOZE:
+        notify_snooze_scheduled()
+
     return db_recommendation
 
 
+@router.post("/bulk-generate", response_model=list[RecommendationResponse])
+def bulk_generate_recommendations(
+    request: RecommendationBulkGenerate, session: SessionDep
+):
+    """
+    Generate recommendations for many alarms using the rules engine.
+
+    All recommendations and turbine state changes are written in a single
+    transaction, so a nightly batch pays for one commit instead of one per
+    alarm.
+
+    Args:
+        request: Alarm IDs to generate recommendations for
+        session: Database session
+
+    Returns:
+        Generated recommendations, in request order
+
+    Raises:
+        HTTPException: If any alarm is not found
+    """
+    alarm_ids = list(dict.fromkeys(request.alarm_ids))
+
+    # Load every requested alarm in one query
+    alarms_by_id = {
+        alarm.id: alarm
+        for alarm in session.exec(select(Alarm).where(Alarm.id.in_(alarm_ids))).all()
+    }
+    missing = [alarm_id for alarm_id in alarm_ids if alarm_id not in alarms_by_id]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Alarms not found: {missing}")
+
+    # Alarm history for the whole batch is loaded in one query
+    alarms = [alarms_by_id[alarm_id] for alarm_id in alarm_ids]
+    generated = RulesEngine.generate_recommendations_bulk(alarms, session)
+
+    recommendations = []
+    state_updates = []
+    for alarm, recommendation_data in zip(alarms, generated):
+        if not recommendation_data:
+            continue
+
+        db_recommendation = Recommendation(**recommendation_data)
+        session.add(db_recommendation)
+        recommendations.append(db_recommendation)
+
+        if db_recommendation.action:
+            state_updates.append(
+                (alarm.turbine_db_id, db_recommendation.action, alarm)
+            )
+
+    # Update turbine states based on actions, one UPDATE per target state
+    RulesEngine.update_turbine_states_bulk(state_updates, session)
+    session.commit()
+
+    # Wake the worker so any snooze expiries are scheduled promptly
+    if any(r.action == RecommendationAction.SNOOZE for r in recommendations):
+        notify_snooze_scheduled()
+
+    return recommendations
+
+
 @router.post("", response_model=RecommendationResponse, status_code=201)
 def create_manual_recommendation(
     recommendation: RecommendationCreate, session: SessionDep
@@ -174,6 +258,9 @@ def create_manual_recommendation(
     session.commit()
     session.refresh(db_recommendation)
 
+    if db_recommendation.action == RecommendationAction.SNOOZE:
+        notify_snooze_scheduled()
+
     return db_recommendation
 
 
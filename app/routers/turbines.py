@@ -1,13 +1,13 @@
 """Turbine registry endpoints."""
 
-from datetime import datetime
 from typing import Optional
 
 from fastapi import APIRouter, HTTPException, Query
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import select
 
-from app.db import SessionDep
-from app.models import Turbine
+from app.db import SessionDep, count_rows
+from app.models import Turbine, utcnow
 from app.schemas import (
     TurbineCreate,
     TurbineListResponse,
@@ -33,20 +33,18 @@ def create_turbine(turbine: TurbineCreate, session: SessionDep):
     Raises:
         HTTPException: If turbine_id already exists
     """
-    # Check if turbine_id already exists
-    existing = session.exec(
-        select(Turbine).where(Turbine.turbine_id == turbine.turbine_id)
-    ).first()
+    db_turbine = Turbine.model_validate(turbine)
+    session.add(db_turbine)
 
-    if existing:
+    # Rely on the unique index on turbine_id rather than a racy pre-check
+    try:
+        session.commit()
+    except IntegrityError:
+        session.rollback()
         raise HTTPException(
             status_code=400,
             detail=f"Turbine with turbine_id '{turbine.turbine_id}' already exists",
         )
-
-    db_turbine = Turbine.model_validate(turbine)
-    session.add(db_turbine)
-    session.commit()
     session.refresh(db_turbine)
 
     return db_turbine
@@ -73,22 +71,25 @@ def list_turbines(
     Returns:
         List of turbines and total count
     """
-    query = select(Turbine)
-
-    # Apply filters
+    # Collect filters so the count and page queries share them
+    filters = []
     if is_active is not None:
-        query = query.where(Turbine.is_active == is_active)
+        filters.append(Turbine.is_active == is_active)
     if location:
-        query = query.where(Turbine.location.contains(location))
+        filters.append(Turbine.location.contains(location))
 
-    # Get total count
-    total = len(session.exec(query).all())
+    # Get total count without loading rows
+    total = count_rows(session, Turbine, filters)
 
     # Apply pagination
-    query = query.offset(skip).limit(limit)
+    query = select(Turbine).where(*filters).offset(skip).limit(limit)
     turbines = session.exec(query).all()
 
-    return TurbineListResponse(turbines=turbines, total=total)
+    # Rows come straight from the database, so skip per-row validation
+    return TurbineListResponse.model_construct(
+        turbines=[TurbineResponse.from_orm_fast(turbine) for turbine in turbines],
+        total=total,
+    )
 
 
 @router.get("/{turbine_id}", response_model=TurbineResponse)
@@ -144,7 +145,7 @@ def update_turbine(turbine_id: str, turbine_update: TurbineUpdate, session: Sess
     for field, value in update_data.items():
         setattr(turbine, field, value)
 
-    turbine.updated_at = datetime.utcnow()
+    turbine.updated_at = utcnow()
     session.add(turbine)
     session.commit()
     session.refresh(turbine)
@@ -172,7 +173,7 @@ def delete_turbine(turbine_id: str, session: SessionDep):
         raise HTTPException(status_code=404, detail="Turbine not found")
 
     turbine.is_active = False
-    turbine.updated_at = datetime.utcnow()
+    turbine.updated_at = utcnow()
     session.add(turbine)
     session.commit()
 
@@ -1,10 +1,15 @@
 """Enhanced rules engine for generating recommendations based on alarms with FHP-style logic."""
 
 import json
-from datetime import datetime, timedelta
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import timedelta
+from functools import lru_cache
+from itertools import chain
 from typing import Optional, Tuple
 
-from sqlmodel import Session, select
+from sqlalchemy import event, lambda_stmt, tuple_
+from sqlmodel import Session, func, select, update
 
 from app.models import (
     Alarm,
@@ -12,9 +17,14 @@ from app.models import (
     Recommendation,
     RecommendationAction,
     RecommendationPriority,
+    Turbine,
     TurbineState,
+    utcnow,
 )
 
+# session.info key for history counts memoized within a transaction
+_HISTORY_CACHE_KEY = "rules_engine_history"
+
 
 class RulesEngine:
     """Business logic for analyzing alarms and generating recommendations with advanced FHP-style rules."""
@@ -23,7 +33,20 @@ class RulesEngine:
     TEMP_THRESHOLD = 75.0
 
     # High-temperature alarm codes
-    TEMP_CRITICAL_CODES = ["EM_83", "TEMP_HIGH", "GEARBOX_OVERHEAT", "GEARBOX_TEMP_HIGH"]
+    TEMP_CRITICAL_CODES = frozenset(
+        {"EM_83", "TEMP_HIGH", "GEARBOX_OVERHEAT", "GEARBOX_TEMP_HIGH"}
+    )
+
+    # High severity alarms older than this are escalated
+    HIGH_SEVERITY_ESCALATION_AGE = timedelta(hours=1)
+
+    # Alarm codes that always warrant escalation
+    ESCALATION_CODES = frozenset(
+        {"GEARBOX_TEMP_HIGH", "GRID_DISCONNECT", "PITCH_SYSTEM_FAULT"}
+    )
+
+    # Alarm codes that leave a reset turbine running derated
+    DERATED_CODES = frozenset({"YAW_ERROR", "LOW_WIND_SPEED", "MINOR_VIBRATION"})
 
     # Frequency thresholds
     FREQ_24H_THRESHOLD = 4  # If alarm occurs 4+ times in 24h, escalate
@@ -32,9 +55,21 @@ class RulesEngine:
     # Oscillation detection window (minutes)
     OSCILLATION_WINDOW = 10
 
+    # History windows, built once rather than per decision
+    _OSCILLATION_DELTA = timedelta(minutes=OSCILLATION_WINDOW)
+    _DAY_DELTA = timedelta(hours=24)
+    _WEEK_DELTA = timedelta(days=7)
+
     # Snooze default duration (minutes)
     DEFAULT_SNOOZE_MINUTES = 20
 
+    # Priority overrides by action; other actions keep the rule's priority
+    ACTION_PRIORITIES = {
+        RecommendationAction.ESCALATE: RecommendationPriority.URGENT,
+        RecommendationAction.WAIT_COOL_DOWN: RecommendationPriority.HIGH,
+        RecommendationAction.SNOOZE: RecommendationPriority.MEDIUM,
+    }
+
     # Define alarm code to recommendation mapping
     ALARM_RULES = {
         "GEARBOX_TEMP_HIGH": {
@@ -121,6 +156,58 @@ class RulesEngine:
         },
     }
 
+    # Generic recommendation details for alarm codes without a specific rule
+    SEVERITY_MAPPING = {
+        AlarmSeverity.CRITICAL: {
+            "priority": RecommendationPriority.URGENT,
+            "action_items": [
+                "Stop turbine operation immediately",
+                "Dispatch emergency maintenance team",
+                "Perform safety inspection",
+                "Contact manufacturer support",
+            ],
+            "estimated_downtime_hours": 24.0,
+        },
+        AlarmSeverity.HIGH: {
+            "priority": RecommendationPriority.HIGH,
+            "action_items": [
+                "Schedule urgent maintenance inspection",
+                "Review recent operational data",
+                "Check related system components",
+                "Reduce turbine load if safe",
+            ],
+            "estimated_downtime_hours": 12.0,
+        },
+        AlarmSeverity.MEDIUM: {
+            "priority": RecommendationPriority.MEDIUM,
+            "action_items": [
+                "Schedule routine maintenance inspection",
+                "Monitor alarm frequency",
+                "Review maintenance history",
+                "Check sensor calibration",
+            ],
+            "estimated_downtime_hours": 4.0,
+        },
+        AlarmSeverity.LOW: {
+            "priority": RecommendationPriority.LOW,
+            "action_items": [
+                "Log alarm for trending analysis",
+                "Monitor during next scheduled maintenance",
+                "Verify sensor readings",
+            ],
+            "estimated_downtime_hours": 0.0,
+        },
+    }
+
+    # Action items serialized once rather than on every recommendation
+    _ACTION_ITEMS_JSON = {
+        code: json.dumps(rule["action_items"]) for code, rule in ALARM_RULES.items()
+    }
+    _SEVERITY_ACTION_ITEMS_JSON = {
+        severity: json.dumps(info["action_items"])
+        for severity, info in SEVERITY_MAPPING.items()
+    }
+
     @classmethod
     def decide_action(
         cls, alarm: Alarm, session: Session
@@ -149,18 +236,17 @@ class RulesEngine:
                 "Alarm is not resettable and requires manual intervention.",
             )
 
+        # Rules 2 and 3 share a single history query
+        oscillation_count, freq_24h, freq_7d = cls._count_history(alarm, session)
+
         # Rule 2: Oscillation detection
-        oscillation_detected = cls._check_oscillation(alarm, session)
-        if oscillation_detected:
+        if oscillation_count > 0:
             return (
                 RecommendationAction.ESCALATE,
                 f"Oscillation detected: Same fault code appeared twice within {cls.OSCILLATION_WINDOW} minutes.",
             )
 
         # Rule 3: Frequency check
-        freq_24h = cls._count_alarms_in_window(alarm, session, hours=24)
-        freq_7d = cls._count_alarms_in_window(alarm, session, hours=168)  # 7 days
-
         if freq_24h >= cls.FREQ_24H_THRESHOLD:
             return (
                 RecommendationAction.ESCALATE,
@@ -191,56 +277,96 @@ class RulesEngine:
         )
 
     @classmethod
-    def _check_oscillation(cls, alarm: Alarm, session: Session) -> bool:
+    def _count_history(cls, alarm: Alarm, session: Session) -> Tuple[int, int, int]:
         """
-        Check if the same alarm code occurred within the oscillation window.
+        Count earlier occurrences of the same alarm code in one round-trip.
 
         Args:
             alarm: Current alarm
             session: Database session
 
         Returns:
-            True if oscillation detected
+            Tuple of (alarms within the oscillation window before this one,
+            alarms in the last 24 hours, alarms in the last 7 days)
         """
-        cutoff_time = alarm.occurred_at - timedelta(minutes=cls.OSCILLATION_WINDOW)
-
-        # Query for same alarm code on same turbine within window
-        query = select(Alarm).where(
-            Alarm.turbine_db_id == alarm.turbine_db_id,
-            Alarm.alarm_code == alarm.alarm_code,
-            Alarm.occurred_at >= cutoff_time,
-            Alarm.occurred_at < alarm.occurred_at,
-            Alarm.id != alarm.id,  # Exclude current alarm
+        # Counts depend only on turbine, code and time; reuse them until the
+        # session commits, rolls back or flushes alarm changes
+        key = (alarm.turbine_db_id, alarm.alarm_code, alarm.occurred_at)
+        cache = session.info.get(_HISTORY_CACHE_KEY)
+        if cache and key in cache and not _has_pending_alarms(session):
+            return cache[key]
+
+        turbine_db_id, alarm_code, occurred_at = key
+        oscillation_cutoff = occurred_at - cls._OSCILLATION_DELTA
+        day_cutoff = occurred_at - cls._DAY_DELTA
+        week_cutoff = occurred_at - cls._WEEK_DELTA
+
+        # Hot path: the lambda caches statement construction and compiled SQL,
+        # with the closure values bound as parameters. Conditional aggregates
+        # run over the widest (7 day) window; the oscillation window ends
+        # before this alarm, which excludes it
+        query = lambda_stmt(
+            lambda: select(
+                func.count().filter(
+                    Alarm.occurred_at >= oscillation_cutoff,
+                    Alarm.occurred_at < occurred_at,
+                ),
+                func.count().filter(Alarm.occurred_at >= day_cutoff),
+                func.count(),
+            ).where(
+                Alarm.turbine_db_id == turbine_db_id,
+                Alarm.alarm_code == alarm_code,
+                Alarm.occurred_at >= week_cutoff,
+            )
         )
 
-        previous_alarms = session.exec(query).all()
-        return len(previous_alarms) > 0
+        counts = tuple(session.exec(query).one())
+        session.info.setdefault(_HISTORY_CACHE_KEY, {})[key] = counts
+        return counts
 
     @classmethod
-    def _count_alarms_in_window(
-        cls, alarm: Alarm, session: Session, hours: int
-    ) -> int:
+    def preload_history(cls, alarms: list[Alarm], session: Session) -> None:
         """
-        Count occurrences of the same alarm code in a time window.
+        Load the history counts for many alarms with a single query.
+
+        Seeds the per-session cache read by _count_history, so a following
+        loop of generate_recommendation calls issues no history queries.
 
         Args:
-            alarm: Current alarm
+            alarms: Alarms about to be evaluated
             session: Database session
-            hours: Time window in hours
-
-        Returns:
-            Count of alarms
         """
-        cutoff_time = alarm.occurred_at - timedelta(hours=hours)
+        # Non-resettable alarms escalate before any history is consulted
+        alarms = [alarm for alarm in alarms if alarm.resettable]
+        if not alarms:
+            return
 
-        query = select(Alarm).where(
-            Alarm.turbine_db_id == alarm.turbine_db_id,
-            Alarm.alarm_code == alarm.alarm_code,
-            Alarm.occurred_at >= cutoff_time,
+        pairs = {(alarm.turbine_db_id, alarm.alarm_code) for alarm in alarms}
+        query = select(Alarm.turbine_db_id, Alarm.alarm_code, Alarm.occurred_at).where(
+            tuple_(Alarm.turbine_db_id, Alarm.alarm_code).in_(pairs),
+            Alarm.occurred_at
+            >= min(alarm.occurred_at for alarm in alarms) - cls._WEEK_DELTA,
         )
 
-        alarms = session.exec(query).all()
-        return len(alarms)
+        # Sorted occurrence times per (turbine, code)
+        history = defaultdict(list)
+        for turbine_db_id, alarm_code, occurred_at in session.exec(query):
+            history[(turbine_db_id, alarm_code)].append(occurred_at)
+        for times in history.values():
+            times.sort()
+
+        # Same windows as _count_history: the oscillation window ends before
+        # the alarm, the frequency windows are open-ended
+        cache = session.info.setdefault(_HISTORY_CACHE_KEY, {})
+        for alarm in alarms:
+            times = history[(alarm.turbine_db_id, alarm.alarm_code)]
+            occurred_at = alarm.occurred_at
+            cache[(alarm.turbine_db_id, alarm.alarm_code, occurred_at)] = (
+                bisect_left(times, occurred_at)
+                - bisect_left(times, occurred_at - cls._OSCILLATION_DELTA),
+                len(times) - bisect_left(times, occurred_at - cls._DAY_DELTA),
+                len(times) - bisect_left(times, occurred_at - cls._WEEK_DELTA),
+            )
 
     @classmethod
     def _calculate_avg_temperature(
@@ -257,8 +383,9 @@ class RulesEngine:
         Returns:
             Average temperature or None
         """
-        query = (
-            select(Alarm)
+        # Average the most recent readings in SQL
+        recent = (
+            select(Alarm.temperature_c)
             .where(
                 Alarm.turbine_db_id == alarm.turbine_db_id,
                 Alarm.alarm_code == alarm.alarm_code,
@@ -266,14 +393,10 @@ class RulesEngine:
             )
             .order_by(Alarm.occurred_at.desc())
             .limit(count)
+            .subquery()
         )
 
-        alarms = session.exec(query).all()
-        if not alarms:
-            return None
-
-        temps = [a.temperature_c for a in alarms if a.temperature_c is not None]
-        return sum(temps) / len(temps) if temps else None
+        return session.exec(select(func.avg(recent.c.temperature_c))).one()
 
     @classmethod
     def generate_recommendation(
@@ -296,27 +419,83 @@ class RulesEngine:
         if session:
             action, rationale = cls.decide_action(alarm, session)
 
+        # Static fields depend only on code, severity and action, so they are cached
+        recommendation = {
+            "alarm_db_id": alarm.id,
+            **cls._recommendation_plan(alarm.alarm_code, alarm.severity, action),
+            "action": action,
+            "rationale": rationale,
+            "is_automated": True,
+        }
+
+        # Generic recommendations echo the alarm's own description
+        if alarm.alarm_code not in cls.ALARM_RULES:
+            recommendation["description"] = (
+                f"Standard response for {alarm.severity.value} severity alarm: "
+                f"{alarm.alarm_description}"
+            )
+
+        return recommendation
+
+    @classmethod
+    def generate_recommendations_bulk(
+        cls, alarms: list[Alarm], session: Session
+    ) -> list[dict]:
+        """
+        Generate recommendations for many alarms.
+
+        History for all alarms is loaded with one query up front instead of
+        one query per alarm.
+
+        Args:
+            alarms: The alarms to analyze
+            session: Database session
+
+        Returns:
+            Recommendation dictionaries, in the same order as alarms
+        """
+        cls.preload_history(alarms, session)
+        return [cls.generate_recommendation(alarm, session) for alarm in alarms]
+
+    @classmethod
+    @lru_cache(maxsize=4096)
+    def _recommendation_plan(
+        cls,
+        alarm_code: str,
+        severity: AlarmSeverity,
+        action: RecommendationAction,
+    ) -> dict:
+        """
+        Build the static fields of a recommendation.
+
+        The result is a pure function of the arguments and is memoized;
+        callers must copy it rather than mutate it.
+
+        Args:
+            alarm_code: Alarm code
+            severity: Alarm severity
+            action: Recommended action
+
+        Returns:
+            Dictionary with title, priority, action items and downtime
+        """
         # Check if we have a specific rule for this alarm code
-        if alarm.alarm_code in cls.ALARM_RULES:
-            rule = cls.ALARM_RULES[alarm.alarm_code]
+        if alarm_code in cls.ALARM_RULES:
+            rule = cls.ALARM_RULES[alarm_code]
 
             # Adjust priority based on action
             priority = cls._get_priority_for_action(action, rule["priority"])
 
             return {
-                "alarm_db_id": alarm.id,
                 "title": rule["title"],
                 "description": rule["description"],
                 "priority": priority,
-                "action": action,
-                "rationale": rationale,
-                "action_items": json.dumps(rule["action_items"]),
+                "action_items": cls._ACTION_ITEMS_JSON[alarm_code],
                 "estimated_downtime_hours": rule["estimated_downtime_hours"],
-                "is_automated": True,
             }
 
         # Generate generic recommendation based on severity
-        return cls._generate_generic_recommendation(alarm, action, rationale)
+        return cls._generate_generic_recommendation(alarm_code, severity, action)
 
     @classmethod
     def _get_priority_for_action(
@@ -332,92 +511,38 @@ class RulesEngine:
         Returns:
             Adjusted priority
         """
-        if action == RecommendationAction.ESCALATE:
-            return RecommendationPriority.URGENT
-        elif action == RecommendationAction.WAIT_COOL_DOWN:
-            return RecommendationPriority.HIGH
-        elif action == RecommendationAction.SNOOZE:
-            return RecommendationPriority.MEDIUM
-        else:
-            return default_priority
+        return cls.ACTION_PRIORITIES.get(action, default_priority)
 
     @classmethod
     def _generate_generic_recommendation(
         cls,
-        alarm: Alarm,
+        alarm_code: str,
+        severity: AlarmSeverity,
         action: RecommendationAction,
-        rationale: str,
     ) -> dict:
         """
-        Generate a generic recommendation based on alarm severity.
+        Generate the static fields of a generic recommendation based on severity.
 
         Args:
-            alarm: The alarm object to analyze
+            alarm_code: Alarm code
+            severity: Alarm severity
             action: Recommended action
-            rationale: Action rationale
 
         Returns:
             Dictionary with generic recommendation details
         """
-        severity_mapping = {
-            AlarmSeverity.CRITICAL: {
-                "priority": RecommendationPriority.URGENT,
-                "action_items": [
-                    "Stop turbine operation immediately",
-                    "Dispatch emergency maintenance team",
-                    "Perform safety inspection",
-                    "Contact manufacturer support",
-                ],
-                "estimated_downtime_hours": 24.0,
-            },
-            AlarmSeverity.HIGH: {
-                "priority": RecommendationPriority.HIGH,
-                "action_items": [
-                    "Schedule urgent maintenance inspection",
-                    "Review recent operational data",
-                    "Check related system components",
-                    "Reduce turbine load if safe",
-                ],
-                "estimated_downtime_hours": 12.0,
-            },
-            AlarmSeverity.MEDIUM: {
-                "priority": RecommendationPriority.MEDIUM,
-                "action_items": [
-                    "Schedule routine maintenance inspection",
-                    "Monitor alarm frequency",
-                    "Review maintenance history",
-                    "Check sensor calibration",
-                ],
-                "estimated_downtime_hours": 4.0,
-            },
-            AlarmSeverity.LOW: {
-                "priority": RecommendationPriority.LOW,
-                "action_items": [
-                    "Log alarm for trending analysis",
-                    "Monitor during next scheduled maintenance",
-                    "Verify sensor readings",
-                ],
-                "estimated_downtime_hours": 0.0,
-            },
-        }
-
-        severity_info = severity_mapping.get(
-            alarm.severity, severity_mapping[AlarmSeverity.MEDIUM]
-        )
+        if severity not in cls.SEVERITY_MAPPING:
+            severity = AlarmSeverity.MEDIUM
+        severity_info = cls.SEVERITY_MAPPING[severity]
 
         # Adjust priority based on action
         priority = cls._get_priority_for_action(action, severity_info["priority"])
 
         return {
-            "alarm_db_id": alarm.id,
-            "title": f"Generic Recommendation for {alarm.alarm_code}",
-            "description": f"Standard response for {alarm.severity.value} severity alarm: {alarm.alarm_description}",
+            "title": f"Generic Recommendation for {alarm_code}",
             "priority": priority,
-            "action": action,
-            "rationale": rationale,
-            "action_items": json.dumps(severity_info["action_items"]),
+            "action_items": cls._SEVERITY_ACTION_ITEMS_JSON[severity],
             "estimated_downtime_hours": severity_info["estimated_downtime_hours"],
-            "is_automated": True,
         }
 
     @classmethod
@@ -431,25 +556,16 @@ class RulesEngine:
         Returns:
             True if alarm should be escalated
         """
-        # Escalate critical alarms
-        if alarm.severity == AlarmSeverity.CRITICAL:
-            return True
-
-        # Escalate high severity alarms older than 1 hour
-        if alarm.severity == AlarmSeverity.HIGH:
-            if (datetime.utcnow() - alarm.occurred_at) > timedelta(hours=1):
-                return True
-
-        # Check if alarm is in critical codes list
-        critical_codes = ["GEARBOX_TEMP_HIGH", "GRID_DISCONNECT", "PITCH_SYSTEM_FAULT"]
-        if alarm.alarm_code in critical_codes:
-            return True
-
-        # Not resettable
-        if not alarm.resettable:
-            return True
-
-        return False
+        # Cheapest checks first; the clock is only read for high severity
+        return (
+            not alarm.resettable
+            or alarm.severity == AlarmSeverity.CRITICAL
+            or alarm.alarm_code in cls.ESCALATION_CODES
+            or (
+                alarm.severity == AlarmSeverity.HIGH
+                and utcnow() - alarm.occurred_at > cls.HIGH_SEVERITY_ESCALATION_AGE
+            )
+        )
 
     @classmethod
     def update_turbine_state(
@@ -458,6 +574,7 @@ class RulesEngine:
         action: RecommendationAction,
         alarm: Alarm,
         session: Session,
+        commit: bool = True,
     ) -> None:
         """
         Update turbine state based on recommendation action and alarm details.
@@ -474,40 +591,117 @@ class RulesEngine:
             action: Recommended action
             alarm: The alarm that triggered the action
             session: Database session
+            commit: Commit immediately; pass False to leave it to the caller
         """
-        from app.models import Turbine
-
-        turbine = session.get(Turbine, turbine_id)
-        if not turbine:
+        new_state = cls._target_state(action, alarm)
+        if new_state is None:
             return
 
-        old_state = turbine.state
+        # Single conditional UPDATE; timestamps only move if the state changes
+        now = utcnow()
+        result = session.exec(
+            update(Turbine)
+            .where(Turbine.id == turbine_id, Turbine.state != new_state)
+            .values(state=new_state, last_state_change=now, updated_at=now)
+        )
+
+        if result.rowcount and commit:
+            session.commit()
+
+    @classmethod
+    def update_turbine_states_bulk(
+        cls,
+        updates: list[Tuple[int, RecommendationAction, Alarm]],
+        session: Session,
+    ) -> None:
+        """
+        Apply many turbine state updates with one UPDATE per target state.
+
+        Uses the same state logic as update_turbine_state; when a turbine
+        appears more than once, its last update wins. Committing is left to
+        the caller.
+
+        Args:
+            updates: Tuples of (turbine database ID, action, triggering alarm)
+            session: Database session
+        """
+        # Final target state per turbine
+        targets = {}
+        for turbine_id, action, alarm in updates:
+            new_state = cls._target_state(action, alarm)
+            if new_state is not None:
+                targets[turbine_id] = new_state
+
+        turbines_by_state = defaultdict(list)
+        for turbine_id, new_state in targets.items():
+            turbines_by_state[new_state].append(turbine_id)
+
+        # Only turbines whose state actually changes get new timestamps
+        now = utcnow()
+        for new_state, turbine_ids in turbines_by_state.items():
+            session.exec(
+                update(Turbine)
+                .where(Turbine.id.in_(turbine_ids), Turbine.state != new_state)
+                .values(state=new_state, last_state_change=now, updated_at=now)
+            )
+
+    @classmethod
+    def _target_state(
+        cls, action: RecommendationAction, alarm: Alarm
+    ) -> Optional[TurbineState]:
+        """
+        Map a recommendation action to the turbine state it implies.
+
+        Args:
+            action: Recommended action
+            alarm: The alarm that triggered the action
+
+        Returns:
+            New turbine state, or None to leave the state unchanged
+        """
+        # Special case: Check for specific alarm codes that indicate derated operation
+        if (
+            alarm.alarm_code in cls.DERATED_CODES
+            and action == RecommendationAction.RESET
+        ):
+            return TurbineState.IMPACTED
 
         # Map actions to turbine states based on real-world operations
         if action == RecommendationAction.ESCALATE:
             # Critical issues requiring repair
-            turbine.state = TurbineState.REPAIR
+            return TurbineState.REPAIR
         elif action == RecommendationAction.WAIT_COOL_DOWN:
             # Temperature related, online but not performing
-            turbine.state = TurbineState.AVAILABLE
+            return TurbineState.AVAILABLE
         elif action == RecommendationAction.RESET:
             # Normal operation restored
-            turbine.state = TurbineState.ONLINE
+            return TurbineState.ONLINE
         elif action == RecommendationAction.SNOOZE:
             # Manual stop or load shutdown
-            turbine.state = TurbineState.STOPPED
+            return TurbineState.STOPPED
         elif action == RecommendationAction.MANUAL_INSPECTION:
             # Operating with reduced capacity
-            turbine.state = TurbineState.IMPACTED
-        
-        # Special case: Check for specific alarm codes that indicate derated operation
-        derated_codes = ["YAW_ERROR", "LOW_WIND_SPEED", "MINOR_VIBRATION"]
-        if alarm.alarm_code in derated_codes and action == RecommendationAction.RESET:
-            turbine.state = TurbineState.IMPACTED
-
-        # Update timestamp if state changed
-        if turbine.state != old_state:
-            turbine.last_state_change = datetime.utcnow()
-            turbine.updated_at = datetime.utcnow()
-            session.add(turbine)
-            session.commit()
+            return TurbineState.IMPACTED
+
+        return None
+
+
+def _has_pending_alarms(session: Session) -> bool:
+    """Check whether the session holds unflushed alarm changes."""
+    pending = chain(session.new, session.dirty, session.deleted)
+    return any(isinstance(obj, Alarm) for obj in pending)
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_history_on_alarm_flush(session, flush_context):
+    """Drop memoized history counts when alarms are written."""
+    if _has_pending_alarms(session):
+        session.info.pop(_HISTORY_CACHE_KEY, None)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _invalidate_history_on_transaction_end(session, transaction):
+    """Drop memoized history counts when the outermost transaction ends."""
+    # Savepoints (begin_nested) end inside the transaction; keep the cache
+    if transaction.parent is None:
+        session.info.pop(_HISTORY_CACHE_KEY, None)
@@ -1,9 +1,9 @@
 """Pydantic schemas for API request/response models."""
 
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 from app.models import (
     AlarmSeverity,
@@ -14,6 +14,36 @@ from app.models import (
 )
 
 
+# ============= Fast Path =============
+
+
+class ORMFastPath:
+    """
+    Mixin for response schemas built from trusted database rows.
+
+    List endpoints use from_orm_fast to skip per-field validation on every
+    row. Untrusted input (TurbineCreate, AlarmCreate, ...) still goes through
+    model_validate.
+    """
+
+    @classmethod
+    def from_orm_fast(cls, obj: Any) -> Any:
+        """
+        Build the schema from an ORM object without validation.
+
+        Attributes are copied as-is, so nested schema fields are not converted.
+
+        Args:
+            obj: ORM object with an attribute for every schema field
+
+        Returns:
+            Schema instance
+        """
+        return cls.model_construct(
+            **{name: getattr(obj, name) for name in cls.model_fields}
+        )
+
+
 # ============= Turbine Schemas =============
 
 
@@ -45,7 +75,7 @@ class TurbineUpdate(BaseModel):
     state: Optional[TurbineState] = Field(None, description="Manual state override")
 
 
-class TurbineResponse(TurbineBase):
+class TurbineResponse(TurbineBase, ORMFastPath):
     """Schema for turbine response."""
 
     id: int
@@ -53,8 +83,7 @@ class TurbineResponse(TurbineBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ============= Alarm Schemas =============
@@ -87,22 +116,18 @@ class AlarmUpdate(BaseModel):
     resolved_at: Optional[datetime] = None
 
 
-class AlarmResponse(AlarmBase):
+class AlarmResponse(AlarmBase, ORMFastPath):
     """Schema for alarm response."""
 
     id: int
     turbine_db_id: int
     status: AlarmStatus
-    resettable: bool
-    temperature_c: Optional[float] = None
-    note: Optional[str] = None
     acknowledged_at: Optional[datetime] = None
     resolved_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class AlarmWithTurbine(AlarmResponse):
@@ -134,7 +159,13 @@ class RecommendationCreate(RecommendationBase):
     alarm_id: int
 
 
-class RecommendationResponse(RecommendationBase):
+class RecommendationBulkGenerate(BaseModel):
+    """Schema for generating recommendations for many alarms at once."""
+
+    alarm_ids: list[int] = Field(..., min_length=1, max_length=1000)
+
+
+class RecommendationResponse(RecommendationBase, ORMFastPath):
     """Schema for recommendation response."""
 
     id: int
@@ -144,8 +175,7 @@ class RecommendationResponse(RecommendationBase):
     snooze_until: Optional[datetime] = None
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class RecommendationWithAlarm(RecommendationResponse):
@@ -161,7 +191,9 @@ class TurbineListResponse(BaseModel):
     """Schema for list of turbines."""
 
     turbines: list[TurbineResponse]
-    total: int
+    total: int = Field(
+        ..., description="Total matches; estimated for large unfiltered tables"
+    )
 
 
 class AlarmListResponse(BaseModel):
@@ -175,7 +207,9 @@ class RecommendationListResponse(BaseModel):
     """Schema for list of recommendations."""
 
     recommendations: list[RecommendationResponse]
-    total: int
+    total: int = Field(
+        ..., description="Total matches; estimated for large unfiltered tables"
+    )
 
 
 # ============= Health Check Schema =============
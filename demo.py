@@ -11,10 +11,27 @@ import httpx
 
 BASE_URL = "http://localhost:8000/api/v1"
 
+# Enough keep-alive connections for every concurrent demo request to reuse one
+CLIENT_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=32)
+
+SEVERITY_ICONS = {
+    "low": "🟢",
+    "medium": "🟡",
+    "high": "🟠",
+    "critical": "🔴",
+}
+
+PRIORITY_ICONS = {
+    "low": "🟢",
+    "medium": "🟡",
+    "high": "🟠",
+    "urgent": "🔴",
+}
+
 
 async def demo():
     """Run a complete demo of the API."""
-    async with httpx.AsyncClient() as client:
+    async with httpx.AsyncClient(limits=CLIENT_LIMITS, timeout=10.0) as client:
         print("=" * 60)
         print("Wind Fault Orchestrator API Demo")
         print("=" * 60)
@@ -52,8 +69,11 @@ async def demo():
             },
         ]
 
-        for turbine in turbines:
-            response = await client.post(f"{BASE_URL}/turbines", json=turbine)
+        # Register all turbines concurrently
+        responses = await asyncio.gather(
+            *(client.post(f"{BASE_URL}/turbines", json=t) for t in turbines)
+        )
+        for turbine, response in zip(turbines, responses):
             if response.status_code == 201:
                 print(f"   ✓ Registered: {turbine['turbine_id']} - {turbine['name']}")
             elif response.status_code == 400:
@@ -96,9 +116,12 @@ async def demo():
             },
         ]
 
+        # Ingest all alarms concurrently; gather keeps them in request order
+        responses = await asyncio.gather(
+            *(client.post(f"{BASE_URL}/alarms", json=a) for a in alarms)
+        )
         alarm_ids = []
-        for alarm in alarms:
-            response = await client.post(f"{BASE_URL}/alarms", json=alarm)
+        for alarm, response in zip(alarms, responses):
             if response.status_code == 201:
                 data = response.json()
                 alarm_ids.append(data["id"])
@@ -134,13 +157,7 @@ async def demo():
             data = response.json()
             print(f"   Total active alarms: {data['total']}")
             for alarm in data["alarms"]:
-                severity_icons = {
-                    "low": "🟢",
-                    "medium": "🟡",
-                    "high": "🟠",
-                    "critical": "🔴",
-                }
-                icon = severity_icons.get(alarm["severity"], "⚪")
+                icon = SEVERITY_ICONS.get(alarm["severity"], "⚪")
                 print(
                     f"   {icon} Alarm #{alarm['id']}: {alarm['alarm_code']} - {alarm['severity'].upper()}"
                 )
@@ -155,13 +172,7 @@ async def demo():
             data = response.json()
             print(f"   Total recommendations: {data['total']}")
             for rec in data["recommendations"]:
-                priority_icons = {
-                    "low": "🟢",
-                    "medium": "🟡",
-                    "high": "🟠",
-                    "urgent": "🔴",
-                }
-                icon = priority_icons.get(rec["priority"], "⚪")
+                icon = PRIORITY_ICONS.get(rec["priority"], "⚪")
                 auto = "🤖 Auto" if rec["is_automated"] else "👤 Manual"
                 print(f"   {icon} {rec['priority'].upper()}: {rec['title']} {auto}")
                 print(f"      {rec['description']}")
@@ -223,8 +234,16 @@ if __name__ == "__main__":
     time.sleep(2)
     print()
 
+    # uvloop is installed with uvicorn[standard] on Linux and macOS
+    try:
+        import uvloop
+
+        run = uvloop.run
+    except ImportError:
+        run = asyncio.run
+
     try:
-        asyncio.run(demo())
+        run(demo())
     except httpx.ConnectError:
         print("❌ Error: Could not connect to API server.")
         print("Please make sure the server is running on http://localhost:8000")
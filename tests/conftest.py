@@ -0,0 +1,33 @@
+"""Shared pytest fixtures."""
+
+import os
+import tempfile
+
+# Point the app at a throwaway SQLite database before it creates its engine
+_DB_DIR = tempfile.mkdtemp(prefix="wfo-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlmodel import Session, SQLModel  # noqa: E402
+
+from app.cache import response_cache  # noqa: E402
+from app.db import create_db_and_tables, engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+@pytest.fixture
+def session():
+    """Database session on freshly created tables."""
+    SQLModel.metadata.drop_all(engine)
+    create_db_and_tables()
+    response_cache.clear()
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def client(session):
+    """Test client running the full app lifespan."""
+    with TestClient(app) as client:
+        yield client
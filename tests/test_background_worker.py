@@ -0,0 +1,152 @@
+"""Tests for the background worker."""
+
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlmodel import select
+
+from app.background_worker import BackgroundWorker
+from app.db import engine
+from app.models import (
+    Alarm,
+    Recommendation,
+    RecommendationAction,
+    Turbine,
+    utcnow,
+)
+from app.rules_engine import RulesEngine
+
+EXPIRED_SNOOZES = 6
+
+
+def _seed_expired_snoozes(session):
+    """
+    Seed live alarms whose snoozed recommendations have expired.
+
+    Returns:
+        IDs of the expired recommendations
+    """
+    turbine = Turbine(
+        turbine_id="WT-001",
+        name="T1",
+        location="Test Field",
+        model="V90",
+        capacity_kw=2000,
+    )
+    session.add(turbine)
+    session.flush()
+
+    now = utcnow()
+    recommendations = []
+    for i in range(EXPIRED_SNOOZES):
+        alarm = Alarm(
+            turbine_db_id=turbine.id,
+            alarm_code=f"CODE_{i}",
+            alarm_description="snoozed",
+            occurred_at=now - timedelta(hours=i + 1),
+        )
+        session.add(alarm)
+        session.flush()
+
+        recommendation = Recommendation(
+            alarm_db_id=alarm.id,
+            title="Snoozed",
+            description="Snoozed",
+            action=RecommendationAction.SNOOZE,
+            snooze_until=now - timedelta(minutes=1),
+        )
+        session.add(recommendation)
+        recommendations.append(recommendation)
+
+    session.commit()
+    return [r.id for r in recommendations]
+
+
+def test_sweep_preloads_history_once_per_chunk(session):
+    """Per-item savepoints keep the preloaded history cache alive."""
+    _seed_expired_snoozes(session)
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        BackgroundWorker()._check_snoozed_alarms_sync()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    # _count_history's conditional aggregates vs preload_history's row scan
+    preload_marker = "(alarms.turbine_db_id, alarms.alarm_code) IN"
+    history_counts = [s for s in statements if "FILTER (WHERE" in s]
+    preloads = [s for s in statements if preload_marker in s]
+
+    assert len(preloads) == 1
+    assert history_counts == []
+
+    still_snoozed = session.exec(
+        select(Recommendation).where(Recommendation.snooze_until.is_not(None))
+    ).all()
+    assert still_snoozed == []
+
+
+def test_sweep_keeps_each_item_atomic(session, monkeypatch):
+    """A failed item keeps its snooze and gains no replacement recommendation."""
+    expired_ids = _seed_expired_snoozes(session)
+    failing_alarm = session.exec(
+        select(Alarm).where(Alarm.alarm_code == "CODE_2")
+    ).one()
+
+    update_turbine_state = RulesEngine.update_turbine_state.__func__
+
+    def fail_for_one_alarm(cls, turbine_id, action, alarm, session, commit=True):
+        if alarm.id == failing_alarm.id:
+            raise RuntimeError("state update failed")
+        update_turbine_state(cls, turbine_id, action, alarm, session, commit)
+
+    monkeypatch.setattr(
+        RulesEngine, "update_turbine_state", classmethod(fail_for_one_alarm)
+    )
+    BackgroundWorker()._check_snoozed_alarms_sync()
+
+    # Start a new read transaction to see the worker's commits
+    session.rollback()
+    recommendations = session.exec(select(Recommendation)).all()
+    replacements = {r.alarm_db_id for r in recommendations if r.id not in expired_ids}
+    still_snoozed = {r.alarm_db_id for r in recommendations if r.snooze_until}
+
+    assert len(replacements) == EXPIRED_SNOOZES - 1
+    assert failing_alarm.id not in replacements
+    assert still_snoozed == {failing_alarm.id}
+
+
+def test_sweep_never_persists_replacement_without_clearing_snooze(
+    session, monkeypatch
+):
+    """A crash before the chunk commit leaves no half-applied items."""
+    expired_ids = _seed_expired_snoozes(session)
+
+    reevaluate = BackgroundWorker._reevaluate
+
+    def reevaluate_then_crash(session, expired_recommendations):
+        reevaluate(session, expired_recommendations)
+        raise RuntimeError("worker crashed before commit")
+
+    monkeypatch.setattr(
+        BackgroundWorker, "_reevaluate", staticmethod(reevaluate_then_crash)
+    )
+    with pytest.raises(RuntimeError):
+        BackgroundWorker()._check_snoozed_alarms_sync()
+
+    # Whatever was persisted, each alarm has a replacement iff its snooze ended
+    session.rollback()
+    recommendations = session.exec(select(Recommendation)).all()
+    replacements = {r.alarm_db_id for r in recommendations if r.id not in expired_ids}
+    cleared = {
+        r.alarm_db_id
+        for r in recommendations
+        if r.id in expired_ids and r.snooze_until is None
+    }
+    assert replacements == cleared
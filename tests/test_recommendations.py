@@ -0,0 +1,143 @@
+"""Tests for the recommendation endpoints."""
+
+from datetime import timedelta
+
+from app.models import utcnow
+
+API = "/api/v1"
+
+# Fields that depend only on the rules engine's decision
+DECISION_FIELDS = (
+    "title",
+    "description",
+    "priority",
+    "action",
+    "rationale",
+    "action_items",
+    "estimated_downtime_hours",
+    "is_automated",
+    "snooze_until",
+)
+
+
+def _seed_fleet(client, prefix, now):
+    """
+    Register three turbines and ingest alarms covering every rule.
+
+    Args:
+        client: Test client
+        prefix: Turbine ID prefix, so identical fleets can share a database
+        now: Reference time for alarm timestamps
+
+    Returns:
+        Tuple of (turbine IDs, alarm IDs in ingestion order)
+    """
+    turbine_ids = [f"{prefix}-{i}" for i in range(1, 4)]
+    for turbine_id in turbine_ids:
+        response = client.post(
+            f"{API}/turbines",
+            json={
+                "turbine_id": turbine_id,
+                "name": turbine_id,
+                "location": "Test Field",
+                "model": "V90",
+                "capacity_kw": 2000,
+            },
+        )
+        assert response.status_code == 201, response.text
+
+    t1, t2, t3 = turbine_ids
+    alarms = [
+        # Hot gearbox, then the same code again inside the oscillation window
+        (t1, "GEARBOX_TEMP_HIGH", "high", 80.0, True, timedelta(hours=3)),
+        (t1, "GEARBOX_TEMP_HIGH", "high", 70.0, True, timedelta(hours=2, minutes=55)),
+        # Derated code, then a non-resettable unknown code on the same turbine
+        (t2, "YAW_ERROR", "medium", None, True, timedelta(hours=2)),
+        (t2, "UNKNOWN_CODE", "low", None, False, timedelta(hours=1)),
+    ] + [
+        # Repeats an hour apart until the 24 hour frequency rule trips
+        (t3, "EM_83", "medium", 60.0, True, timedelta(hours=hours))
+        for hours in range(6, 0, -1)
+    ]
+
+    alarm_ids = []
+    for turbine_id, code, severity, temperature, resettable, age in alarms:
+        response = client.post(
+            f"{API}/alarms",
+            json={
+                "turbine_id": turbine_id,
+                "alarm_code": code,
+                "alarm_description": f"{code} reported",
+                "severity": severity,
+                "temperature_c": temperature,
+                "resettable": resettable,
+                "occurred_at": (now - age).isoformat(),
+            },
+        )
+        assert response.status_code == 201, response.text
+        alarm_ids.append(response.json()["id"])
+
+    return turbine_ids, alarm_ids
+
+
+def _turbine_states(client, turbine_ids):
+    """Current state of each turbine, in the given order."""
+    return [
+        client.get(f"{API}/turbines/{turbine_id}").json()["state"]
+        for turbine_id in turbine_ids
+    ]
+
+
+def _decisions(recommendations):
+    """Decision fields of each recommendation, in order."""
+    return [{field: r[field] for field in DECISION_FIELDS} for r in recommendations]
+
+
+def test_bulk_generate_matches_per_alarm_generate(client):
+    """Bulk generation gives the same recommendations and states as /generate."""
+    now = utcnow()
+    single_turbines, single_alarms = _seed_fleet(client, "SINGLE", now)
+    bulk_turbines, bulk_alarms = _seed_fleet(client, "BULK", now)
+
+    single = []
+    for alarm_id in single_alarms:
+        response = client.post(f"{API}/recommendations/{alarm_id}/generate")
+        assert response.status_code == 200, response.text
+        single.append(response.json())
+
+    response = client.post(
+        f"{API}/recommendations/bulk-generate", json={"alarm_ids": bulk_alarms}
+    )
+    assert response.status_code == 200, response.text
+    bulk = response.json()
+
+    assert [r["alarm_db_id"] for r in single] == single_alarms
+    assert [r["alarm_db_id"] for r in bulk] == bulk_alarms
+    assert _decisions(bulk) == _decisions(single)
+
+    # Every rule is exercised, so the comparison is not trivially uniform
+    assert {r["action"] for r in bulk} == {"escalate", "wait_cool_down", "reset"}
+
+    assert _turbine_states(client, bulk_turbines) == _turbine_states(
+        client, single_turbines
+    )
+
+
+def test_bulk_generate_unknown_alarm_returns_404(client):
+    """An unknown alarm ID fails the whole batch, like /generate does."""
+    _, alarm_ids = _seed_fleet(client, "WT", utcnow())
+    before = client.get(f"{API}/recommendations").json()["total"]
+
+    missing_id = max(alarm_ids) + 1000
+    response = client.post(f"{API}/recommendations/{missing_id}/generate")
+    assert response.status_code == 404
+
+    response = client.post(
+        f"{API}/recommendations/bulk-generate",
+        json={"alarm_ids": [alarm_ids[0], missing_id]},
+    )
+    assert response.status_code == 404
+    assert response.json()["detail"] == f"Alarms not found: [{missing_id}]"
+
+    # Nothing is written when the batch is rejected
+    assert client.get(f"{API}/recommendations").json()["total"] == before
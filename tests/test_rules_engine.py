@@ -0,0 +1,98 @@
+"""Tests for the rules engine."""
+
+from datetime import datetime, timedelta
+
+from sqlmodel import Session, select
+
+from app.db import engine
+from app.models import Alarm, Turbine
+from app.rules_engine import _HISTORY_CACHE_KEY, RulesEngine
+
+REFERENCE_TIME = datetime(2026, 1, 1, 12, 0, 0)
+TICK = timedelta(microseconds=1)
+
+# Offsets from the reference alarm, on and just past every window boundary
+BOUNDARY_OFFSETS = [
+    timedelta(0),
+    timedelta(0),
+    TICK,
+    -TICK,
+    -RulesEngine._OSCILLATION_DELTA,
+    -RulesEngine._OSCILLATION_DELTA - TICK,
+    -RulesEngine._DAY_DELTA,
+    -RulesEngine._DAY_DELTA - TICK,
+    -RulesEngine._WEEK_DELTA,
+    -RulesEngine._WEEK_DELTA - TICK,
+]
+
+
+def _seed_boundary_alarms(session):
+    """Seed alarms on the window boundaries, plus unrelated noise."""
+    turbine = Turbine(
+        turbine_id="WT-001",
+        name="T1",
+        location="Test Field",
+        model="V90",
+        capacity_kw=2000,
+    )
+    other = Turbine(
+        turbine_id="WT-002",
+        name="T2",
+        location="Test Field",
+        model="V90",
+        capacity_kw=2000,
+    )
+    session.add_all([turbine, other])
+    session.flush()
+
+    for offset in BOUNDARY_OFFSETS:
+        for turbine_db_id, code in (
+            (turbine.id, "EM_83"),
+            (turbine.id, "YAW_ERROR"),
+            (other.id, "EM_83"),
+        ):
+            session.add(
+                Alarm(
+                    turbine_db_id=turbine_db_id,
+                    alarm_code=code,
+                    alarm_description="boundary",
+                    occurred_at=REFERENCE_TIME + offset,
+                )
+            )
+    session.commit()
+
+
+def test_preload_history_matches_count_history(session):
+    """The preloaded bisect counts agree with the SQL counts on every boundary."""
+    _seed_boundary_alarms(session)
+    alarms = session.exec(select(Alarm).order_by(Alarm.id)).all()
+
+    RulesEngine.preload_history(alarms, session)
+    preloaded = session.info[_HISTORY_CACHE_KEY]
+
+    for alarm in alarms:
+        key = (alarm.turbine_db_id, alarm.alarm_code, alarm.occurred_at)
+
+        # A separate session has an empty cache, so this runs the SQL query
+        with Session(engine) as fresh:
+            assert RulesEngine._count_history(alarm, fresh) == preloaded[key], key
+
+
+def test_count_history_window_bounds(session):
+    """Windows include their cutoff; only the oscillation window excludes now."""
+    _seed_boundary_alarms(session)
+    alarm = session.exec(
+        select(Alarm).where(
+            Alarm.alarm_code == "EM_83", Alarm.occurred_at == REFERENCE_TIME
+        )
+    ).first()
+
+    with Session(engine) as fresh:
+        oscillation, day, week = RulesEngine._count_history(alarm, fresh)
+
+    # Just before now and exactly on the 10 minute cutoff
+    assert oscillation == 2
+    # Everything from the 24 hour cutoff on, including now and later
+    assert day == 7
+    # Everything but the alarm just past the 7 day cutoff
+    assert week == 9